@@ -4,107 +4,531 @@
 Flora/OS Generative Core (v3.0 - Production Final)
 """
 import argparse
+import array
 import pickle
 import json
+import struct
 import numpy as np
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Turtle opcodes as bytes: forward step, and the rotation/bracket symbols.
+_F_OPCODE = ord('F')
+_TURTLE_OPCODES = np.frombuffer(b"+-&^\\/[]", dtype=np.uint8)
+_BRACKET_OPCODES = np.frombuffer(b"[]", dtype=np.uint8)
+# Rotations between re-orthonormalizations of the turtle frame.
+_RENORMALIZE_EVERY = 1000
+
 class LSystem:
     def __init__(self, axiom, rules):
         self.axiom = axiom
         self.rules = rules
         self.state = axiom
+        self._str_rules = {k: v for k, v in rules.items() if isinstance(v, str)}
+        self._list_rules = {k: v for k, v in rules.items() if isinstance(v, list) and v}
+        self._successors = dict(self._str_rules)
+        self._successors.update((k, v[0].get('successor', k)) for k, v in self._list_rules.items())
+        # str.translate rewrites every symbol in one C-level pass; multi-character
+        # successors are supported directly by the table.
+        self._table = str.maketrans({k: v for k, v in self._successors.items() if len(k) == 1})
 
     def iterate(self, n=1):
         for _ in range(n):
-            new_state = ""
-            for char in self.state:
-                rule = self.rules.get(char)
-                if isinstance(rule, str):
-                    new_state += rule
-                elif isinstance(rule, list) and rule:
-                    new_state += rule[0].get('successor', char)
-                else:
-                    new_state += char
-            self.state = new_state
+            self.state = self.state.translate(self._table)
+        return self.state
+
+    def iterate_memoized(self, n=1):
+        """Equivalent to iterate(n), built from per-symbol expansions.
+
+        The d-step expansion of a symbol is fixed, so each depth is assembled
+        by joining the previous depth's expansions of the successor symbols
+        rather than rewriting the whole string one character at a time.
+        """
+        successors = self._successors
+        alphabet = set(self.state).union(successors, *successors.values())
+        expand = {symbol: symbol for symbol in alphabet}
+        for _ in range(n):
+            expand = {symbol: ''.join([expand[c] for c in successors.get(symbol, symbol)]) for symbol in alphabet}
+        self.state = ''.join([expand[c] for c in self.state])
         return self.state
 
+    def stream(self, n=1, chunk_size=1 << 16):
+        """Yield the n-step expansion of the current state in pieces.
+
+        ''.join(stream(n)) equals iterate(n), but the full string is never
+        built: symbols are unfolded depth-first from a stack of
+        (symbol, depth) pairs, and any sub-expansion of at most `chunk_size`
+        symbols is emitted whole from a memo table. Peak memory is bounded by
+        the chunk size rather than the final string length. self.state is
+        left unchanged.
+        """
+        for _, chunk in self.stream_pieces(n, chunk_size):
+            yield chunk
+
+    def stream_pieces(self, n=1, chunk_size=1 << 16):
+        """Like stream(), but yield (key, chunk) pairs.
+
+        Whole sub-expansions of at least chunk_size // 8 symbols are yielded on
+        their own with key (symbol, depth), so equal keys always carry the same
+        chunk; smaller pieces are batched together under key None.
+        """
+        successors = self._successors
+        alphabet = set(self.state).union(successors, *successors.values())
+        # lengths[d][s] is the length of the d-step expansion of s.
+        lengths = [dict.fromkeys(alphabet, 1)]
+        for _ in range(n):
+            prev = lengths[-1]
+            lengths.append({s: sum(prev[c] for c in successors.get(s, s)) for s in alphabet})
+        memo = {}
+
+        def expansion(symbol, depth):
+            key = (symbol, depth)
+            if key not in memo:
+                memo[key] = symbol if depth == 0 else ''.join(
+                    [expansion(c, depth - 1) for c in successors.get(symbol, symbol)])
+            return memo[key]
+
+        stack = [(c, n) for c in reversed(self.state)]
+        pending, pending_len = [], 0
+        while stack:
+            symbol, depth = stack.pop()
+            size = lengths[depth][symbol]
+            if size > chunk_size:
+                stack.extend((c, depth - 1) for c in reversed(successors.get(symbol, symbol)))
+            elif size >= max(chunk_size // 8, 1):
+                if pending:
+                    yield None, ''.join(pending)
+                    pending, pending_len = [], 0
+                yield (symbol, depth), expansion(symbol, depth)
+            else:
+                pending.append(expansion(symbol, depth))
+                pending_len += size
+                if pending_len >= chunk_size:
+                    yield None, ''.join(pending)
+                    pending, pending_len = [], 0
+        if pending:
+            yield None, ''.join(pending)
+
+@njit(cache=True)
+def _run_commands(cmds, frame, stack, sp, cos_a, sin_a, step_length, vertices, n, curve_start,
+                  counts, rotations, renormalize_every):
+    """Compiled turtle interpreter over ASCII opcodes.
+
+    `frame` rows are position, direction and up; `stack` rows are flattened
+    frames. The open curve starts at vertex `curve_start`. Vertices and the
+    counts of curves closed by brackets are written into the preallocated
+    buffers. Each rotation axis is normalized, and the frame is
+    re-orthonormalized every `renormalize_every` rotations. Returns (n_vertices, curve_start, n_counts, stack,
+    stack_pointer, rotations).
+    """
+    one_minus_cos = 1.0 - cos_a
+    n_counts = 0
+    for c in cmds:
+        if c == 70:  # F
+            for i in range(3):
+                frame[0, i] += frame[1, i] * step_length
+                vertices[n, i] = frame[0, i]
+            n += 1
+        elif c == 91 or c == 93:  # [ ]
+            if n - curve_start > 1:
+                counts[n_counts] = n - curve_start
+                n_counts += 1
+            else:
+                n = curve_start
+            curve_start = n
+            if c == 91:
+                if sp == stack.shape[0]:
+                    grown = np.empty((2 * sp + 1, 9))
+                    grown[:sp] = stack[:sp]
+                    stack = grown
+                for i in range(3):
+                    for j in range(3):
+                        stack[sp, 3 * i + j] = frame[i, j]
+                sp += 1
+            elif sp > 0:
+                sp -= 1
+                for i in range(3):
+                    for j in range(3):
+                        frame[i, j] = stack[sp, 3 * i + j]
+            else:
+                continue
+            for i in range(3):
+                vertices[n, i] = frame[0, i]
+            n += 1
+        else:
+            dx, dy, dz = frame[1, 0], frame[1, 1], frame[1, 2]
+            ux, uy, uz = frame[2, 0], frame[2, 1], frame[2, 2]
+            if c == 43:  # +
+                ax, ay, az = ux, uy, uz
+            elif c == 45:  # -
+                ax, ay, az = -ux, -uy, -uz
+            elif c == 38 or c == 94:  # & ^
+                ax, ay, az = dy * uz - dz * uy, dz * ux - dx * uz, dx * uy - dy * ux
+                if c == 94:
+                    ax, ay, az = -ax, -ay, -az
+            elif c == 92:  # backslash
+                ax, ay, az = dx, dy, dz
+            elif c == 47:  # /
+                ax, ay, az = -dx, -dy, -dz
+            else:
+                continue
+            # Rounding keeps the frame only nearly orthonormal; an unnormalized
+            # axis would compound that error on every rotation.
+            norm = np.sqrt(ax * ax + ay * ay + az * az)
+            if norm == 0.0:
+                continue
+            ax, ay, az = ax / norm, ay / norm, az / norm
+            for r in range(1, 3):
+                vx, vy, vz = frame[r, 0], frame[r, 1], frame[r, 2]
+                k = (ax * vx + ay * vy + az * vz) * one_minus_cos
+                frame[r, 0] = vx * cos_a + (ay * vz - az * vy) * sin_a + ax * k
+                frame[r, 1] = vy * cos_a + (az * vx - ax * vz) * sin_a + ay * k
+                frame[r, 2] = vz * cos_a + (ax * vy - ay * vx) * sin_a + az * k
+            rotations += 1
+            if rotations % renormalize_every == 0:
+                norm = np.sqrt(frame[1, 0] ** 2 + frame[1, 1] ** 2 + frame[1, 2] ** 2)
+                for i in range(3):
+                    frame[1, i] /= norm
+                k = frame[1, 0] * frame[2, 0] + frame[1, 1] * frame[2, 1] + frame[1, 2] * frame[2, 2]
+                for i in range(3):
+                    frame[2, i] -= k * frame[1, i]
+                norm = np.sqrt(frame[2, 0] ** 2 + frame[2, 1] ** 2 + frame[2, 2] ** 2)
+                for i in range(3):
+                    frame[2, i] /= norm
+    return n, curve_start, n_counts, stack, sp, rotations
+
+def _cross(a, b):
+    # np.cross carries ~30 us of axis handling per call; this is ~1 us.
+    ax, ay, az = a.tolist()
+    bx, by, bz = b.tolist()
+    return np.array((ay * bz - az * by, az * bx - ax * bz, ax * by - ay * bx))
+
+def _local_rotation(axis, cos_a, sin_a):
+    """Rodrigues rotation about a frame-local axis, as the matrix M with
+    new_frame_rows = M @ frame_rows for frame rows (direction, up, left)."""
+    x, y, z = axis
+    skew = np.array([[0.0, -z, y], [z, 0.0, -x], [-y, x, 0.0]])
+    rotation = cos_a * np.eye(3) + sin_a * skew + (1.0 - cos_a) * np.outer(axis, axis)
+    return rotation.T
+
 class Turtle:
-    def __init__(self, angle=22.5):
+    # Rotation axis per command in the turtle's own (direction, up,
+    # direction x up) frame. The frame is kept orthonormal, so each rotation
+    # is a fixed matrix in these coordinates.
+    _LOCAL_AXES = {
+        '+': (0.0, 1.0, 0.0),
+        '-': (0.0, -1.0, 0.0),
+        '&': (0.0, 0.0, 1.0),
+        '^': (0.0, 0.0, -1.0),
+        '\\': (1.0, 0.0, 0.0),
+        '/': (-1.0, 0.0, 0.0),
+    }
+
+    def __init__(self, angle=22.5, dedup=False):
+        """With dedup=True, execute() returns (points, counts, indices): the
+        distinct vertices in first-seen order, the curve vertex counts, and
+        one index per curve vertex into points, so points[indices] is the
+        full vertex sequence the counts describe."""
         self.position = np.array([0.0, 0.0, 0.0])
         self.direction = np.array([0.0, 1.0, 0.0])
         self.up = np.array([0.0, 0.0, 1.0])
         self.angle = np.radians(angle)
-        self.stack = []
-        self.all_points = []
-        self.curve_vertex_counts = []
-        self.point_map = {}
-
-    def _get_point_index(self, pos):
-        pos_tuple = tuple(np.round(pos, 5))
-        if pos_tuple not in self.point_map:
-            self.point_map[pos_tuple] = len(self.all_points)
-            self.all_points.append(list(pos))
-        return self.point_map[pos_tuple]
+        self._cos = float(np.cos(self.angle))
+        self._sin = float(np.sin(self.angle))
+        self._local_rotations = {c: _local_rotation(axis, self._cos, self._sin) for c, axis in self._LOCAL_AXES.items()}
+        self._rotation_runs = {}
+        # Saved frames as flattened (position, direction, up) rows.
+        self.stack = np.empty((64, 9))
+        self._sp = 0
+        self.vertices = np.empty((0, 3), dtype=np.float32)
+        self._n = 0
+        self._curve_start = 0
+        self.curve_vertex_counts = array.array('i')
+        self.dedup = dedup
+        self._rotations = 0
+        self._orthonormalize()
+
+    def _reserve(self, extra):
+        needed = self._n + extra
+        if needed > len(self.vertices):
+            grown = np.empty((max(needed, 2 * len(self.vertices)), 3), dtype=np.float32)
+            grown[:self._n] = self.vertices[:self._n]
+            self.vertices = grown
+
+    def _start_curve(self):
+        self._curve_start = self._n
+        self.vertices[self._n] = self.position
+        self._n += 1
+
+    def _end_curve(self):
+        # A curve that never received a segment contributes no vertices.
+        if self._n - self._curve_start > 1:
+            self.curve_vertex_counts.append(self._n - self._curve_start)
+        else:
+            self._n = self._curve_start
+
+    def _open_branch(self):
+        self._end_curve()
+        self._push()
+        self._start_curve()
+
+    def _close_branch(self):
+        self._end_curve()
+        if self._sp:
+            self._pop()
+            self._start_curve()
+        else:
+            self._curve_start = self._n
+
+    def _unique_points(self):
+        points = self.vertices[:self._n]
+        # Quantize to 1e-5 and pack into one int64 key per point when the
+        # extent allows it; hashing ints is much cheaper than float rows.
+        q = np.rint(np.multiply(points, 1e5, dtype=np.float64)).astype(np.int64)
+        if len(q):
+            q -= q.min(axis=0)
+        if not len(q) or q.max() < 1 << 21:
+            keys = q[:, 0] | (q[:, 1] << 21) | (q[:, 2] << 42)
+            _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        else:
+            _, first, inverse = np.unique(q, axis=0, return_index=True, return_inverse=True)
+        # np.unique numbers points in key order; renumber them in first-seen order.
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        return points[first[order]], rank[inverse.reshape(-1)].astype(np.intc)
 
     def execute(self, lsystem_string, step_length=0.1):
-        current_curve_indices = [self._get_point_index(self.position)]
-        for command in lsystem_string:
-            if command == 'F':
-                self.position += self.direction * step_length
-                current_curve_indices.append(self._get_point_index(self.position))
-            elif command in "+-&^\\/":
-                self._rotate(command)
-            elif command == '[':
-                if len(current_curve_indices) > 1:
-                    self.curve_vertex_counts.append(len(current_curve_indices))
-                self.stack.append((self.position.copy(), self.direction.copy(), self.up.copy()))
-                current_curve_indices = [self._get_point_index(self.position)]
-            elif command == ']':
-                if len(current_curve_indices) > 1:
-                    self.curve_vertex_counts.append(len(current_curve_indices))
-                if self.stack:
-                    self.position, self.direction, self.up = self.stack.pop()
-                    current_curve_indices = [self._get_point_index(self.position)]
-                else:
-                    current_curve_indices = []
-        if len(current_curve_indices) > 1:
-            self.curve_vertex_counts.append(len(current_curve_indices))
-        return self.all_points, self.curve_vertex_counts
-
-    def _rotate(self, command):
-        axis = None
-        angle = self.angle
-        if command == '+': axis = self.up
-        elif command == '-': axis = -self.up
-        elif command == '&': axis = np.cross(self.direction, self.up)
-        elif command == '^': axis = -np.cross(self.direction, self.up)
-        elif command == '\\': axis = self.direction
-        elif command == '/': axis = -self.direction
-        if axis is not None and np.linalg.norm(axis) > 0:
-            axis /= np.linalg.norm(axis)
-            cos_a, sin_a = np.cos(angle), np.sin(angle)
-            self.direction = (self.direction * cos_a + np.cross(axis, self.direction) * sin_a + axis * np.dot(axis, self.direction) * (1 - cos_a))
-            self.up = (self.up * cos_a + np.cross(axis, self.up) * sin_a + axis * np.dot(axis, self.up) * (1 - cos_a))
-
-def run_simulation(prompt_file_path, output_state_path):
+        """Interpret a command string, or an iterable of string chunks such as
+        LSystem.stream(), as one continuous turtle program."""
+        chunks = (lsystem_string,) if isinstance(lsystem_string, str) else lsystem_string
+        return self._execute_pieces(((None, chunk) for chunk in chunks), step_length)
+
+    def execute_stream(self, lsystem, n, step_length=0.1):
+        """Grow `lsystem` n steps and interpret it in one fused pass, without
+        materializing the expanded string.
+
+        Each distinct whole sub-expansion is interpreted once; later
+        occurrences reuse its geometry, transformed into the current frame.
+        """
+        return self._execute_pieces(lsystem.stream_pieces(n), step_length)
+
+    def _execute_pieces(self, pieces, step_length):
+        self._reserve(1)
+        self._start_curve()
+        run = self._interpreter(step_length)
+        templates = {}
+        for key, chunk in pieces:
+            if key is not None and key not in templates:
+                templates[key] = self._record_template(chunk, step_length)
+            template = templates.get(key)
+            if template is None:
+                run(chunk)
+            else:
+                self._apply_template(template)
+        self._end_curve()
+        counts = np.array(self.curve_vertex_counts, dtype=np.intc)
+        if self.dedup:
+            self.all_points, indices = self._unique_points()
+            return self.all_points, counts, indices
+        self.all_points = self.vertices[:self._n]
+        return self.all_points, counts
+
+    def _interpreter(self, step_length):
+        """Return run(chunk), which interprets one chunk with the compiled
+        interpreter when Numba is available and the NumPy one otherwise."""
+        if not NUMBA_AVAILABLE:
+            forward, handlers = self._specialize(step_length)
+
+        def run(chunk):
+            # Upper bound: one vertex per F plus one curve start per bracket.
+            n_brackets = chunk.count('[') + chunk.count(']')
+            self._reserve(chunk.count('F') + n_brackets)
+            if NUMBA_AVAILABLE:
+                self._execute_compiled(chunk, step_length, n_brackets)
+            else:
+                self._execute_vectorized(chunk, forward, handlers)
+
+        return run
+
+    def _record_template(self, chunk, step_length):
+        """Interpret a bracket-balanced chunk from the canonical frame and keep
+        its geometry in frame-local coordinates; None if it is unbalanced."""
+        cmds = np.frombuffer(chunk.encode('utf-8'), dtype=np.uint8)
+        depth = np.cumsum((cmds == ord('[')).astype(np.int32) - (cmds == ord(']')))
+        if len(depth) and (depth.min() < 0 or depth[-1] != 0):
+            return None
+        scratch = Turtle(np.degrees(self.angle))
+        scratch.direction = np.array([1.0, 0.0, 0.0])
+        scratch.up = np.array([0.0, 1.0, 0.0])
+        scratch._reserve(1)
+        scratch._start_curve()
+        scratch._interpreter(step_length)(chunk)
+        vertices = scratch.vertices[:scratch._n]
+        end_frame = (scratch.position, np.array((scratch.direction, scratch.up)))
+        if '[' not in chunk:
+            return vertices[1:], None, None, None, end_frame
+        # Steps before the first bracket extend the caller's open curve; the
+        # scratch curve closed there (or was dropped if it had no steps).
+        head = chunk.count('F', 0, chunk.index('['))
+        counts = scratch.curve_vertex_counts
+        if head:
+            return vertices[1:1 + head], vertices[1 + head:], counts[1:].tobytes(), scratch._n - scratch._curve_start, end_frame
+        return vertices[:0], vertices, counts.tobytes(), scratch._n - scratch._curve_start, end_frame
+
+    def _apply_template(self, template):
+        head, body, counts, open_tail, (end_position, end_heading) = template
+        heading = np.array((self.direction, self.up, _cross(self.direction, self.up)))
+        self._reserve(len(head) + (len(body) if body is not None else 0))
+        self.vertices[self._n:self._n + len(head)] = self.position + head @ heading
+        self._n += len(head)
+        if body is not None:
+            self._end_curve()
+            self.vertices[self._n:self._n + len(body)] = self.position + body @ heading
+            self._n += len(body)
+            self.curve_vertex_counts.frombytes(counts)
+            self._curve_start = self._n - open_tail
+        self.position = self.position + end_position @ heading
+        self.direction, self.up = end_heading @ heading
+        self._orthonormalize()
+
+    def _execute_compiled(self, lsystem_string, step_length, n_brackets):
+        cmds = np.frombuffer(lsystem_string.encode('utf-8'), dtype=np.uint8)
+        frame = np.array([self.position, self.direction, self.up], dtype=np.float64)
+        counts = np.empty(n_brackets, dtype=np.intc)
+        self._n, self._curve_start, n_counts, self.stack, self._sp, self._rotations = _run_commands(
+            cmds, frame, self.stack, self._sp, self._cos, self._sin, step_length,
+            self.vertices, self._n, self._curve_start, counts, self._rotations, _RENORMALIZE_EVERY)
+        self.curve_vertex_counts.frombytes(counts[:n_counts].tobytes())
+        self.position, self.direction, self.up = frame[0].copy(), frame[1].copy(), frame[2].copy()
+
+    def _specialize(self, step_length):
+        """Bind the per-simulation constants of the NumPy interpreter once.
+
+        Returns a forward(k) closure with step_length and the per-run-length
+        offset columns baked in, and the token handler table.
+        """
+        offsets = {}
+
+        def forward(k):
+            column = offsets.get(k)
+            if column is None:
+                column = offsets[k] = (step_length * np.arange(1, k + 1))[:, None]
+            run = self.position + column * self.direction
+            self.vertices[self._n:self._n + k] = run
+            self._n += k
+            self.position = run[-1].copy()
+
+        return forward, {'[': self._open_branch, ']': self._close_branch}
+
+    def _push(self):
+        if self._sp == len(self.stack):
+            self.stack = np.concatenate((self.stack, np.empty_like(self.stack)))
+        entry = self.stack[self._sp]
+        entry[0:3] = self.position
+        entry[3:6] = self.direction
+        entry[6:9] = self.up
+        self._sp += 1
+
+    def _pop(self):
+        self._sp -= 1
+        entry = self.stack[self._sp].copy()
+        self.position, self.direction, self.up = entry[0:3], entry[3:6], entry[6:9]
+
+    def _execute_vectorized(self, lsystem_string, forward, handlers):
+        cmds = np.frombuffer(lsystem_string.encode('utf-8'), dtype=np.uint8)
+        # Positions of every rotation/bracket opcode, and the number of F steps
+        # between each one and the previous; everything else is a no-op.
+        op_idx = np.flatnonzero(np.isin(cmds, _TURTLE_OPCODES))
+        ops = cmds[op_idx]
+        f_before = np.concatenate(([0], np.cumsum(cmds == _F_OPCODE)))
+        runs = np.diff(f_before[op_idx], prepend=0)
+        tail = f_before[-1] - f_before[op_idx[-1]] if len(op_idx) else f_before[-1]
+        # Merge back-to-back rotations (no F in between) into one token.
+        is_rotation = ~np.isin(ops, _BRACKET_OPCODES)
+        continues = is_rotation[1:] & is_rotation[:-1] & (runs[1:] == 0)
+        starts = np.flatnonzero(np.concatenate(([True], ~continues))[:len(ops)]).tolist()
+        op_chars = ops.tobytes().decode('ascii')
+        tokens = [op_chars[a:b] for a, b in zip(starts, starts[1:] + [len(ops)])]
+        rotate = self._rotate
+        for k, token in zip(runs[starts].tolist(), tokens):
+            if k:
+                forward(k)
+            handler = handlers.get(token)
+            if handler is None:
+                rotate(token)
+            else:
+                handler()
+        if tail:
+            forward(int(tail))
+
+    def _rotate(self, commands):
+        # Apply a run of consecutive rotation commands as one composed matrix,
+        # cached per distinct run (e.g. "/////" recurs throughout a plant).
+        rotation = self._rotation_runs.get(commands)
+        if rotation is None:
+            rotation = np.eye(3)
+            for c in commands:
+                rotation = self._local_rotations[c] @ rotation
+            self._rotation_runs[commands] = rotation
+        heading = np.array((self.direction, self.up, _cross(self.direction, self.up)))
+        self.direction, self.up = rotation[:2] @ heading
+        # The local matrices are rotations only in an orthonormal frame, and
+        # any drift would be compounded by the next run; restore it each run.
+        self._orthonormalize()
+
+    def _orthonormalize(self):
+        # Gram-Schmidt: undo floating point drift in the turtle frame.
+        self.direction = self.direction / np.linalg.norm(self.direction)
+        up = self.up - np.dot(self.up, self.direction) * self.direction
+        self.up = up / np.linalg.norm(up)
+
+def run_simulation(prompt_file_path, output_state_path, point_dtype='float32'):
     print("--- Starting Flora/OS Generative Core (v3.0 Final)...---")
-    with open(prompt_file_path, 'r') as f:
-        prompt = json.load(f)
+    with open(prompt_file_path, 'rb') as f:
+        prompt_bytes = f.read()
+    prompt = orjson.loads(prompt_bytes) if ORJSON_AVAILABLE else json.loads(prompt_bytes)
     print(f"Loading digital genome: {prompt['metadata']['simulation_name']}")
     ls_params = prompt['morphogenesis_engine']['l_system_parameters']
     lsystem = LSystem(ls_params['axiom'], ls_params['rules'])
     print("Simulating organism growth (5 iterations)...")
-    final_string = lsystem.iterate(5)
     turtle = Turtle(angle=ls_params['angle_degrees'])
-    points, curve_counts = turtle.execute(final_string)
-    final_state = {'organism_geometry': {'points': points, 'curveVertexCounts': curve_counts}}
+    points, curve_counts = turtle.execute_stream(lsystem, 5)
+    # Store compact numeric buffers rather than per-element Python objects.
+    final_state = {'organism_geometry': {
+        'points': np.asarray(points, dtype=point_dtype),
+        'curveVertexCounts': np.asarray(curve_counts, dtype=np.int32),
+    }}
+    buffers = []
     with open(output_state_path, 'wb') as f:
-        pickle.dump(final_state, f)
+        # Protocol 5 hands the ndarray payloads out of band, so the pickle
+        # itself stays tiny and the arrays can be mapped back without a copy.
+        pickle.dump(final_state, f, protocol=5, buffer_callback=buffers.append)
+    with open(output_state_path + '.buffers', 'wb') as f:
+        for buf in buffers:
+            raw = buf.raw()
+            f.write(struct.pack('<Q', raw.nbytes))
+            f.write(raw)
     print("--- Simulation finished successfully. ---")
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Run the Flora/OS Generative Core simulation.")
     parser.add_argument('--prompt_file', type=str, required=True)
     parser.add_argument('--output_state', type=str, required=True)
+    parser.add_argument('--point_dtype', type=str, choices=['float32', 'float16'], default='float32',
+                        help="Storage precision for point coordinates in the state file.")
     args = parser.parse_args()
-    run_simulation(args.prompt_file, args.output_state)
+    run_simulation(args.prompt_file, args.output_state, args.point_dtype)
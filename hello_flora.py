@@ -1,8 +1,6 @@
 # hello_flora.py
 import sys
 import numpy as np
-import torch
-import dspy
 
 try:
     from pxr import Usd, UsdGeom
@@ -22,6 +20,7 @@ def run_verification():
     except Exception as e:
         print(f"[FAIL] NumPy verification failed: {e}")
     try:
+        import torch
         t = torch.tensor([1, 2, 3])
         assert t.shape == (3,)
         print(f"[*] PyTorch verification successful. Version: {torch.__version__}")
@@ -39,6 +38,7 @@ def run_verification():
     else:
         print("[SKIP] OpenUSD verification skipped.")
     try:
+        import dspy
         sig = dspy.Signature("question -> answer")
         assert isinstance(sig, dspy.Signature)
         print("[*] DSPy verification successful. Signature object created.")
@@ -7,64 +7,230 @@ binary .usdc file from the simulation state. This version contains the
 final bug fix for attribute setting.
 """
 import argparse
+import hashlib
+import mmap
+import os
 import pickle
 import json
+import logging
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 
-def translate_to_usdc(state_file_path, prompt_file_path, output_usd_path):
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from pxr import UsdGeom, Gf, Sdf, Vt
+    USD_AVAILABLE = True
+    # Bound once; each Tokens lookup otherwise crosses into C++ per call.
+    _TOKEN_Y = UsdGeom.Tokens.y
+    _TOKEN_LINEAR = UsdGeom.Tokens.linear
+    _TOKEN_CONSTANT = UsdGeom.Tokens.constant
+    # FromNumpy only exists in newer pxr builds.
+    _VT_FROM_NUMPY = hasattr(Vt.Vec3fArray, 'FromNumpy')
+except ImportError:
+    USD_AVAILABLE = False
+
+logger = logging.getLogger('flora.usd')
+
+# Characters allowed in a UTI but not in a USD prim name.
+_UTI_TRANS = str.maketrans({'.': '_', '-': '_'})
+# Set FLORA_COMPACT_PROMPT=1 to embed the prompt as minified JSON rather than as written.
+_COMPACT_PROMPT = os.environ.get('FLORA_COMPACT_PROMPT') == '1'
+# customLayerData key recording which inputs an output was translated from.
+_SOURCE_HASH_KEY = 'flora:sourceHash'
+# Bump whenever the authored layer changes, so outputs from older code are rebuilt.
+_OUTPUT_FORMAT_VERSION = 2
+
+class _StateUnpickler(pickle.Unpickler):
+    """Unpickler that only resolves the globals NumPy arrays are rebuilt from.
+
+    A state file is plain data, so refusing every other global keeps a
+    tampered pickle from running code when it is loaded.
+    """
+    _ALLOWED_GLOBALS = frozenset({
+        ('numpy', 'dtype'),
+        ('numpy', 'ndarray'),
+        ('numpy._core.numeric', '_frombuffer'),
+        ('numpy._core.multiarray', '_reconstruct'),
+        ('numpy.core.numeric', '_frombuffer'),
+        ('numpy.core.multiarray', '_reconstruct'),
+        ('_codecs', 'encode'),
+    })
+
+    def find_class(self, module, name):
+        if (module, name) not in self._ALLOWED_GLOBALS:
+            raise pickle.UnpicklingError(f"State pickle references disallowed global {module}.{name}")
+        return super().find_class(module, name)
+
+def _load_state(state_file_path):
+    """Unpickles a simulation state, mapping its out-of-band array buffers if present."""
+    buffers = []
+    buffers_path = state_file_path + '.buffers'
+    if os.path.exists(buffers_path) and os.path.getsize(buffers_path):
+        with open(buffers_path, 'rb') as f:
+            # The arrays keep views of the map alive; it is released with them.
+            view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        offset = 0
+        while offset < len(view):
+            (nbytes,) = struct.unpack_from('<Q', view, offset)
+            offset += 8
+            buffers.append(view[offset:offset + nbytes])
+            offset += nbytes
+    # Unpickle straight from the page cache; no bytes copy of the whole file.
+    with open(state_file_path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return _StateUnpickler(mm, buffers=buffers).load()
+
+def _source_hash(prompt_bytes, state_file_path):
+    """Digest of every input a translation reads: the prompt and the state files."""
+    digest = hashlib.blake2b(prompt_bytes, digest_size=16)
+    # The embedded prompt's form and the translator's own output format are part of the output too.
+    digest.update(b'compact' if _COMPACT_PROMPT else b'verbatim')
+    digest.update(b'format:%d' % _OUTPUT_FORMAT_VERSION)
+    for path in (state_file_path, state_file_path + '.buffers'):
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                digest.update(mm)
+    return digest.hexdigest()
+
+def _existing_source_hash(output_usd_path):
+    """Returns the source hash stored in an existing output layer, if any."""
+    if not os.path.exists(output_usd_path):
+        return None
     try:
-        from pxr import Usd, UsdGeom, Gf, Sdf, Vt
-    except ImportError:
-        print("\n!!! CRITICAL ERROR: OpenUSD library (pxr) not found. !!!")
-        with open(output_usd_path, 'w') as f:
+        # Layer metadata only; the geometry is never read.
+        layer = Sdf.Layer.OpenAsAnonymous(output_usd_path, metadataOnly=True)
+    except Exception:
+        # e.g. a "# FAILED" stub written here by an older version.
+        return None
+    return layer.customLayerData.get(_SOURCE_HASH_KEY) if layer else None
+
+def translate_to_usdc(state_file_path, prompt_file_path, output_usd_path, write_ascii=False):
+    """Translates one simulation state into a USD layer and returns the path written.
+
+    A .usda output_usd_path is rewritten to .usdc unless write_ascii is set, so
+    the returned path can differ from the one passed in. On failure the output
+    is left untouched and the error goes to the returned path plus '.err'.
+    """
+    # Export picks the file format from the extension; ASCII is opt-in for debugging.
+    if not write_ascii and output_usd_path.endswith('.usda'):
+        output_usd_path = output_usd_path[:-len('.usda')] + '.usdc'
+        logger.info("Writing binary crate to %s (pass --ascii for .usda).", output_usd_path)
+
+    # Failures are reported next to the output, so a previous good file survives them.
+    error_path = output_usd_path + '.err'
+    if os.path.exists(error_path):
+        os.remove(error_path)
+
+    if not USD_AVAILABLE:
+        logger.critical("!!! CRITICAL ERROR: OpenUSD library (pxr) not found. !!!")
+        with open(error_path, 'w') as f:
             f.write("# FAILED: OpenUSD library not found.")
-        return
+        return output_usd_path
 
-    print("--- Starting translation to USDC (v4.1 Definitive)... ---")
+    logger.info("--- Starting translation to USDC (v4.1 Definitive)... ---")
     try:
-        with open(state_file_path, 'rb') as f:
-            state = pickle.load(f)
-        with open(prompt_file_path, 'r') as f:
-            prompt = json.load(f)
+        with open(prompt_file_path, 'rb') as f:
+            prompt_bytes = f.read()
+        source_hash = _source_hash(prompt_bytes, state_file_path)
+        if _existing_source_hash(output_usd_path) == source_hash:
+            logger.info("--- Inputs unchanged; %s is up to date. ---", output_usd_path)
+            return output_usd_path
 
-        stage = Usd.Stage.CreateNew(output_usd_path)
-        UsdGeom.SetStageUpAxis(stage, UsdGeom.Tokens.y)
+        state = _load_state(state_file_path)
+        prompt = orjson.loads(prompt_bytes) if ORJSON_AVAILABLE else json.loads(prompt_bytes)
+        if not _COMPACT_PROMPT:
+            # The file is already JSON; embed it as written instead of re-dumping.
+            prompt_json = prompt_bytes.decode('utf-8')
+        elif ORJSON_AVAILABLE:
+            prompt_json = orjson.dumps(prompt).decode()
+        else:
+            prompt_json = json.dumps(prompt, ensure_ascii=False, separators=(',', ':'))
 
-        uti = prompt.get('metadata', {}).get('uti', 'UNKNOWN_UTI')
-        prim_path = f"/FloraOrganism_{uti.replace('.', '_').replace('-', '_')}"
-        
-        organism_prim = UsdGeom.Xform.Define(stage, prim_path).GetPrim()
-        organism_prim.CreateAttribute("flora:biologicalPrompt", Sdf.ValueTypeNames.String).Set(json.dumps(prompt, indent=2))
-
-        geometry = state.get('organ_geometry', {})
-        points = geometry.get('points', [])
-        curve_counts = geometry.get('curveVertexCounts', [])
-
-        if points and curve_counts:
-            curves_geom = UsdGeom.BasisCurves.Define(stage, f"{prim_path}/organism_geometry")
-            curves_geom.GetPointsAttr().Set(Vt.Vec3fArray([Gf.Vec3f(p) for p in points]))
-            curves_geom.GetCurveVertexCountsAttr().Set(Vt.IntArray(curve_counts))
-            curves_geom.GetTypeAttr().Set(UsdGeom.Tokens.linear)
-            
-            # This is the corrected, simpler way to set the width
-            curves_geom.CreateWidthsAttr(Vt.FloatArray([0.025]))
-            
-            color_attr = curves_geom.CreateDisplayColorAttr()
-            color_attr.Set(Vt.Vec3fArray([Gf.Vec3f(0.7, 0.85, 0.98)]))
+        geometry = state.get('organism_geometry', {})
+        # For the simulation's default float32/int32 arrays these are views, not copies.
+        points = np.ascontiguousarray(geometry.get('points', ()), dtype=np.float32).reshape(-1, 3)
+        curve_counts = np.ascontiguousarray(geometry.get('curveVertexCounts', ()), dtype=np.int32)
+        if curve_counts.sum() != len(points):
+            raise ValueError(f"curveVertexCounts sum to {curve_counts.sum()} but state has {len(points)} points")
+        has_geometry = bool(points.size and curve_counts.size)
+        if has_geometry:
+            if _VT_FROM_NUMPY:
+                points_vt = Vt.Vec3fArray.FromNumpy(points)
+                counts_vt = Vt.IntArray.FromNumpy(curve_counts)
+            else:
+                # Plain 3-tuples still avoid building a Gf.Vec3f per point.
+                points_vt = Vt.Vec3fArray(list(map(tuple, points.tolist())))
+                counts_vt = Vt.IntArray(curve_counts.tolist())
         else:
-            print("Warning: No geometry data found in simulation state.")
+            logger.warning("No geometry data found in simulation state.")
 
-        stage.GetRootLayer().Save()
-        print(f"--- Translation complete. Valid USDC file saved to: {output_usd_path} ---")
+        uti = prompt.get('metadata', {}).get('uti', 'UNKNOWN_UTI')
+        prim_name = f"FloraOrganism_{uti.translate(_UTI_TRANS)}"
+
+        # Author specs straight into an in-memory layer and export it once.
+        # A single flat prim hierarchy has nothing to compose, so going through
+        # a Usd stage only adds overhead; with the Sdf API every edit is also
+        # safe inside one ChangeBlock.
+        layer = Sdf.Layer.CreateAnonymous('.usdc')
+        with Sdf.ChangeBlock():
+            layer.pseudoRoot.SetInfo(UsdGeom.Tokens.upAxis, _TOKEN_Y)
+            layer.customLayerData = {_SOURCE_HASH_KEY: source_hash}
+            organism_spec = Sdf.PrimSpec(layer, prim_name, Sdf.SpecifierDef, 'Xform')
+            Sdf.AttributeSpec(organism_spec, "flora:biologicalPrompt", Sdf.ValueTypeNames.String,
+                              declaresCustom=True).default = prompt_json
+
+            if has_geometry:
+                curves_spec = Sdf.PrimSpec(organism_spec, 'organism_geometry', Sdf.SpecifierDef, 'BasisCurves')
+                for name, type_name, variability, value in (
+                        ('points', Sdf.ValueTypeNames.Point3fArray, Sdf.VariabilityVarying, points_vt),
+                        ('curveVertexCounts', Sdf.ValueTypeNames.IntArray, Sdf.VariabilityVarying, counts_vt),
+                        ('type', Sdf.ValueTypeNames.Token, Sdf.VariabilityUniform, _TOKEN_LINEAR),
+                        ('widths', Sdf.ValueTypeNames.FloatArray, Sdf.VariabilityVarying, Vt.FloatArray([0.025])),
+                        ('primvars:displayColor', Sdf.ValueTypeNames.Color3fArray, Sdf.VariabilityVarying,
+                         Vt.Vec3fArray([Gf.Vec3f(0.7, 0.85, 0.98)]))):
+                    Sdf.AttributeSpec(curves_spec, name, type_name, variability).default = value
+                # One width and one color for the whole organism: constant
+                # interpolation keeps consumers from expanding them per vertex.
+                for name in ('widths', 'primvars:displayColor'):
+                    curves_spec.attributes[name].SetInfo(UsdGeom.Tokens.interpolation, _TOKEN_CONSTANT)
+
+        layer.Export(output_usd_path)
+        logger.info("--- Translation complete. Valid USDC file saved to: %s ---", output_usd_path)
             
     except Exception as e:
-        print(f"!!! An error occurred during the translation process: {e}")
-        with open(output_usd_path, 'w') as f:
+        logger.error("!!! An error occurred during the translation process: %s", e)
+        with open(error_path, 'w') as f:
             f.write(f"# FAILED to generate USDC. Error: {e}")
+    return output_usd_path
+
+def translate_batch(jobs, write_ascii=False, max_workers=None):
+    """Translates (state_file, prompt_file, output_usd) triples in parallel worker processes.
+
+    Each worker imports pxr once and reuses it for every organism it is handed.
+    Returns the paths actually written, in job order (see translate_to_usdc).
+    """
+    jobs = list(jobs)
+    state_files, prompt_files, output_paths = zip(*jobs) if jobs else ((), (), ())
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(translate_to_usdc, state_files, prompt_files, output_paths,
+                                 [write_ascii] * len(output_paths)))
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Translate a Flora/OS simulation state to a binary USDC file.")
     parser.add_argument('--prompt_file', type=str, required=True)
     parser.add_argument('--state_file', type=str, required=True)
     parser.add_argument('--output_usd', type=str, required=True)
+    parser.add_argument('--ascii', action='store_true',
+                        help="Keep a .usda output path as ASCII; otherwise it is rewritten to .usdc.")
     args = parser.parse_args()
-    translate_to_usdc(args.state_file, args.prompt_file, args.output_usd)
+    # stdout, where the CLI's progress messages have always gone.
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+    translate_to_usdc(args.state_file, args.prompt_file, args.output_usd, args.ascii)